@@ -1,10 +1,19 @@
+import copy
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 from pathlib import Path
+from src.online_ratings import OnlineRatingEngine
 
 RAW_DIR = Path("data/raw")
 PROCESSED_DIR = Path("data/processed")
 PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 
+# Per-season feature partitions; bump the version when the rating loop changes
+FEATURE_PARTITIONS_DIR = PROCESSED_DIR / "feature_partitions"
+PARTITION_CACHE_VERSION = 1
+
 def combine_seasons():
     csv_files = sorted(RAW_DIR.glob("*.csv"))
     dfs = [pd.read_csv(f) for f in csv_files]
@@ -72,23 +81,43 @@ def build_single_row_games():
     print(f"Saved basic game dataset → {out_path} with {len(merged)} games")
 
 
-def add_team_ratings_with_rest_and_home_away():
+def new_team_state():
+    return {
+        "pts_for": 0,
+        "pts_against": 0,
+        "games": 0,
+        "home_pts_for": 0,
+        "home_pts_against": 0,
+        "home_games": 0,
+        "away_pts_for": 0,
+        "away_pts_against": 0,
+        "away_games": 0,
+        "last_game_date": None,
+        "env_totals": [],  # list of recent game totals involving this team
+    }
+
+
+def season_key(season_id):
+    # SEASON_ID is <type digit><start year> (e.g. 22023 regular, 42023 playoffs),
+    # so the last four digits group a whole season together.
+    return str(season_id)[-4:]
+
+
+def season_key_for_date(date):
+    # Same label from a game date: seasons start in the fall, so Jan-Jul
+    # games belong to the season that started the previous year.
+    date = pd.Timestamp(date)
+    return str(date.year if date.month >= 8 else date.year - 1)
+
+
+def compute_team_features(df, team_stats):
     """
-    For each game, add:
-    - overall offensive/defensive ratings
-    - home/away-specific scoring/defense
-    - rest days + back-to-back flags
-    - simple game-environment feature (avg total pts in last ~5 games for each team)
-    - injury impact placeholders (kept, but will be filled via merge later)
+    Run the per-game rating loop over `df` (already sorted by GAME_DATE).
+    `team_stats` is the team -> stats dict from all earlier games; it is
+    updated in place so it can be handed to the next chunk of games.
     """
-    df = pd.read_csv(PROCESSED_DIR / "games_basic.csv", parse_dates=["GAME_DATE"])
-    df = df.sort_values("GAME_DATE").reset_index(drop=True)
-
     records = []
 
-    # team -> stats dict
-    team_stats = {}
-
     for _, row in df.iterrows():
         date = row["GAME_DATE"]
         home = row["home_team"]
@@ -98,22 +127,7 @@ def add_team_ratings_with_rest_and_home_away():
         total_pts = hp + ap
 
         def get_team_stats(team):
-            return team_stats.get(
-                team,
-                {
-                    "pts_for": 0,
-                    "pts_against": 0,
-                    "games": 0,
-                    "home_pts_for": 0,
-                    "home_pts_against": 0,
-                    "home_games": 0,
-                    "away_pts_for": 0,
-                    "away_pts_against": 0,
-                    "away_games": 0,
-                    "last_game_date": None,
-                    "env_totals": [],  # list of recent game totals involving this team
-                },
-            )
+            return team_stats.get(team, new_team_state())
 
         hs = get_team_stats(home)
         as_ = get_team_stats(away)
@@ -187,7 +201,7 @@ def add_team_ratings_with_rest_and_home_away():
         rec["home_env_last5"] = home_env_last5
         rec["away_env_last5"] = away_env_last5
 
-        # injury placeholders (kept; later overridden by merge_injury_impact if CSV present)
+        # injury placeholders (kept; injury_store.attach_injury_impact joins real values at read time)
         rec["home_injury_impact"] = rec.get("home_injury_impact", 0.0)
         rec["away_injury_impact"] = rec.get("away_injury_impact", 0.0)
 
@@ -214,94 +228,146 @@ def add_team_ratings_with_rest_and_home_away():
         as_.setdefault("env_totals", []).append(total_pts)
         team_stats[away] = as_
 
-    feat_df = pd.DataFrame(records)
-    out_path = PROCESSED_DIR / "games_with_features.csv"
-    feat_df.to_csv(out_path, index=False)
-    print(f"Saved game features (with rest/home-away/env/injury placeholders) to {out_path}")
-
+    return records
 
-def merge_injury_impact():
-    games_path = PROCESSED_DIR / "games_with_features.csv"
-    df = pd.read_csv(games_path)
 
-    inj_path = PROCESSED_DIR / "injury_impact_by_game.csv"
-    if not inj_path.exists():
-        print("No injury impact file found, keeping existing injury_impact columns.")
-        return
-
-    inj = pd.read_csv(inj_path)
-
-    # Merge on GAME_ID; if missing, treat as 0 impact
-    df = df.merge(inj, on="GAME_ID", how="left", suffixes=("", "_inj"))
+def advance_team_state(df, team_stats):
+    """
+    Cheap aggregate version of the rating loop: fold a season's games into
+    `team_stats` without building features, so the next season can be seeded
+    with exactly the state the serial scan would have reached.
+    """
+    home = pd.DataFrame({
+        "team": df["home_team"],
+        "GAME_DATE": df["GAME_DATE"],
+        "pts_for": df["home_points"],
+        "pts_against": df["away_points"],
+        "is_home": True,
+    })
+    away = pd.DataFrame({
+        "team": df["away_team"],
+        "GAME_DATE": df["GAME_DATE"],
+        "pts_for": df["away_points"],
+        "pts_against": df["home_points"],
+        "is_home": False,
+    })
+    long = pd.concat([home, away]).sort_values("GAME_DATE", kind="stable")
+    long["total"] = long["pts_for"] + long["pts_against"]
+
+    for team, g in long.groupby("team", sort=False):
+        s = team_stats.get(team, new_team_state())
+        h = g[g["is_home"]]
+        a = g[~g["is_home"]]
+
+        s["pts_for"] += int(g["pts_for"].sum())
+        s["pts_against"] += int(g["pts_against"].sum())
+        s["games"] += len(g)
+        s["home_pts_for"] += int(h["pts_for"].sum())
+        s["home_pts_against"] += int(h["pts_against"].sum())
+        s["home_games"] += len(h)
+        s["away_pts_for"] += int(a["pts_for"].sum())
+        s["away_pts_against"] += int(a["pts_against"].sum())
+        s["away_games"] += len(a)
+        s["last_game_date"] = g["GAME_DATE"].iloc[-1]
+        # only the last 5 totals are ever read, so that's all we carry forward
+        s["env_totals"] = (s["env_totals"] + g["total"].astype(int).tolist())[-5:]
+        team_stats[team] = s
+
+
+def partition_cache_key(season_df, seed_state):
+    h = hashlib.sha1(f"v{PARTITION_CACHE_VERSION}".encode())
+    h.update(pd.util.hash_pandas_object(season_df, index=False).values.tobytes())
+    h.update(json.dumps(seed_state, sort_keys=True, default=str).encode())
+    return h.hexdigest()[:16]
+
+
+def build_season_partition(season_df, seed_state):
+    """Worker entry point: feature-engineer one season from its seed state."""
+    records = compute_team_features(season_df, copy.deepcopy(seed_state))
+    return pd.DataFrame(records, index=season_df.index)
+
+
+def add_team_ratings_with_rest_and_home_away(workers=None):
+    """
+    For each game, add:
+    - overall offensive/defensive ratings
+    - home/away-specific scoring/defense
+    - rest days + back-to-back flags
+    - simple game-environment feature (avg total pts in last ~5 games for each team)
+    - online Elo-style offense/defense ratings (see src/online_ratings.py)
+    - injury impact placeholders (real values live in the injury sidecar, see src/injury_store.py)
+
+    Games are split by season and each season is built in its own worker
+    process, seeded with the end-of-prior-season team state from a cheap
+    aggregate pass, so output matches a single serial scan. Finished seasons
+    are cached in data/processed/feature_partitions; editing one season only
+    rebuilds that season and the ones after it. `workers=1` runs in-process.
+    """
+    df = pd.read_csv(PROCESSED_DIR / "games_basic.csv", parse_dates=["GAME_DATE"])
+    df = df.sort_values("GAME_DATE").reset_index(drop=True)
 
-    for col in ["home_injury_impact", "away_injury_impact"]:
-        inj_col = col + "_inj"
-        if inj_col in df.columns:
-            # overwrite with injury CSV where available; else keep old / 0
-            df[col] = df[inj_col].fillna(df.get(col, 0.0))
-            df.drop(columns=[inj_col], inplace=True)
+    keys = df["season_id"].map(season_key)
+    seasons = sorted(keys.unique())
+
+    # Prefix pass: the state each season starts from
+    partitions = {}
+    seeds = {}
+    state = {}
+    for season in seasons:
+        part = df[keys == season]
+        partitions[season] = part
+        seeds[season] = copy.deepcopy(state)
+        advance_team_state(part, state)
+
+    FEATURE_PARTITIONS_DIR.mkdir(parents=True, exist_ok=True)
+
+    results = {}
+    to_build = {}
+    for season in seasons:
+        key = partition_cache_key(partitions[season], seeds[season])
+        path = FEATURE_PARTITIONS_DIR / f"season_{season}_{key}.pkl"
+        for stale in FEATURE_PARTITIONS_DIR.glob(f"season_{season}_*.pkl"):
+            if stale != path:
+                stale.unlink()
+        if path.exists():
+            results[season] = pd.read_pickle(path)
         else:
-            # if column didn't exist before, create it from CSV or 0
-            df[col] = df[col].fillna(0.0) if col in df.columns else 0.0
-
-    df.to_csv(games_path, index=False)
-    print(f"Merged injury impact into {games_path}")
-
-def merge_injury_impact():
-    games_path = PROCESSED_DIR / "games_with_features.csv"
-    df = pd.read_csv(games_path)
-
-    inj_path = PROCESSED_DIR / "injury_impact_by_game.csv"
-    if not inj_path.exists():
-        print("No injury impact file found, skipping injury merge.")
-        return
-
-    # Try to read the injury file; handle empty file gracefully
-    try:
-        inj = pd.read_csv(inj_path)
-    except pd.errors.EmptyDataError:
-        print("injury_impact_by_game.csv is empty, skipping injury merge.")
-        return
-
-    if inj.empty:
-        print("injury_impact_by_game.csv has no rows, skipping injury merge.")
-        return
-
-    # We expect inj to have: GAME_ID, home_injury_impact, away_injury_impact
-    if "GAME_ID" not in inj.columns:
-        print("injury_impact_by_game.csv missing GAME_ID column, skipping injury merge.")
-        return
-
-    # Merge on GAME_ID
-    df = df.merge(inj, on="GAME_ID", how="left", suffixes=("", "_inj"))
-
-    # Make sure these columns exist, even if they didn't before
-    if "home_injury_impact" not in df.columns:
-        df["home_injury_impact"] = 0.0
-    if "away_injury_impact" not in df.columns:
-        df["away_injury_impact"] = 0.0
-
-    # If there were *_inj columns, use them to overwrite base cols
-    if "home_injury_impact_inj" in df.columns:
-        df["home_injury_impact"] = df["home_injury_impact_inj"].fillna(df["home_injury_impact"])
-        df.drop(columns=["home_injury_impact_inj"], inplace=True)
-
-    if "away_injury_impact_inj" in df.columns:
-        df["away_injury_impact"] = df["away_injury_impact_inj"].fillna(df["away_injury_impact"])
-        df.drop(columns=["away_injury_impact_inj"], inplace=True)
-
-    # Finally, fill any remaining NaNs with 0
-    df["home_injury_impact"] = df["home_injury_impact"].fillna(0.0)
-    df["away_injury_impact"] = df["away_injury_impact"].fillna(0.0)
-
-    df.to_csv(games_path, index=False)
-    print(f"Merged injury impact into {games_path}")
-
+            to_build[season] = path
+
+    if to_build:
+        print(f"Building feature partitions for seasons: {', '.join(to_build)}")
+        if workers == 1:
+            built = {
+                season: build_season_partition(partitions[season], seeds[season])
+                for season in to_build
+            }
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    season: pool.submit(build_season_partition, partitions[season], seeds[season])
+                    for season in to_build
+                }
+                built = {season: fut.result() for season, fut in futures.items()}
+
+        for season, part_df in built.items():
+            part_df.to_pickle(to_build[season])
+            results[season] = part_df
+
+    feat_df = pd.concat([results[s] for s in seasons]).sort_index().reset_index(drop=True)
+
+    # Online Elo-style ratings stream over the whole history in one cheap pass;
+    # the final state is saved so live updates can continue from it.
+    engine = OnlineRatingEngine()
+    elo = engine.process_games(feat_df, seasons=feat_df["season_id"].map(season_key))
+    feat_df = feat_df.join(elo)
+    engine.save()
+    out_path = PROCESSED_DIR / "games_with_features.csv"
+    feat_df.to_csv(out_path, index=False)
+    print(f"Saved game features (with rest/home-away/env/injury placeholders) to {out_path}")
 
 
 if __name__ == "__main__":
     combine_seasons()
     build_single_row_games()
     add_team_ratings_with_rest_and_home_away()
-    merge_injury_impact()
 
@@ -1,21 +1,32 @@
 from pathlib import Path
 import pandas as pd
+from src.injury_store import write_injury_impact, INJURY_IMPACT_PATH
 
 PROCESSED_DIR = Path("data/processed")
 PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def load_player_impacts():
-    path = PROCESSED_DIR / "player_impact_scores.csv"
+def load_player_impact_timeline():
+    path = PROCESSED_DIR / "player_impact_timeline.csv"
     if not path.exists():
         raise FileNotFoundError(
-            "player_impact_scores.csv not found. "
+            "player_impact_timeline.csv not found. "
             "Run `py -m src.build_player_impact` first."
         )
-    df = pd.read_csv(path)
+    df = pd.read_csv(path, parse_dates=["GAME_DATE"])
     # Normalize name for matching
     df["PLAYER_NAME_norm"] = df["PLAYER_NAME"].str.lower().str.strip()
-    return df
+    return df.sort_values("GAME_DATE", kind="stable")
+
+
+def load_game_dates():
+    path = PROCESSED_DIR / "games_basic.csv"
+    if not path.exists():
+        raise FileNotFoundError(
+            "games_basic.csv not found. "
+            "Run `py -m src.build_dataset` first."
+        )
+    return pd.read_csv(path, usecols=["GAME_ID", "GAME_DATE"], parse_dates=["GAME_DATE"])
 
 
 def parse_player_list(s):
@@ -24,6 +35,66 @@ def parse_player_list(s):
     return [p.strip() for p in str(s).split(";") if p.strip()]
 
 
+def explode_out_players(events):
+    """One row per (GAME_ID, side, player) from the ;-separated event columns."""
+    parts = []
+    for side in ["home", "away"]:
+        col = f"{side}_out_players"
+        if col not in events.columns:
+            continue
+        long = events[["GAME_ID", col]].copy()
+        long["player"] = long[col].map(parse_player_list)
+        long = long.explode("player").dropna(subset=["player"])
+        long["side"] = side
+        parts.append(long[["GAME_ID", "side", "player"]])
+    if not parts:
+        return pd.DataFrame(columns=["GAME_ID", "side", "player"])
+    out = pd.concat(parts, ignore_index=True)
+    out["PLAYER_NAME_norm"] = out["player"].str.lower().str.strip()
+    return out
+
+
+def compute_injury_impact(events, timeline, game_dates):
+    """
+    Sum each side's out-player impact as of the game date.
+
+    Every (game, player) pair is matched to the player's latest timeline row
+    strictly before GAME_DATE with one sorted as-of merge, so no game sees
+    stats from itself or later games.
+    """
+    out = explode_out_players(events).merge(game_dates, on="GAME_ID", how="left")
+
+    no_date = out["GAME_DATE"].isna()
+    for game_id in out.loc[no_date, "GAME_ID"].unique():
+        print(f"Warning: no game date for GAME_ID {game_id}")
+    out = out[~no_date].sort_values("GAME_DATE", kind="stable")
+
+    # Same string dtype on both sides, or merge_asof refuses the "by" key
+    out["PLAYER_NAME_norm"] = out["PLAYER_NAME_norm"].astype(str)
+    timeline = timeline[["GAME_DATE", "PLAYER_NAME_norm", "impact_score"]].copy()
+    timeline["PLAYER_NAME_norm"] = timeline["PLAYER_NAME_norm"].astype(str)
+
+    out = pd.merge_asof(
+        out,
+        timeline,
+        on="GAME_DATE",
+        by="PLAYER_NAME_norm",
+        allow_exact_matches=False,
+    )
+
+    for name in out.loc[out["impact_score"].isna(), "player"].unique():
+        print(f"Warning: no impact score for {name}")
+
+    sums = out.pivot_table(
+        index="GAME_ID", columns="side", values="impact_score", aggfunc="sum", fill_value=0.0
+    )
+    res = events[["GAME_ID"]].drop_duplicates().set_index("GAME_ID")
+    for side in ["home", "away"]:
+        col = sums[side] if side in sums.columns else 0.0
+        res[f"{side}_injury_impact"] = col
+    return res.fillna(0.0).reset_index()
+
+
 def build_injury_impact():
     events_path = PROCESSED_DIR / "injury_events.csv"
     if not events_path.exists():
@@ -33,41 +104,16 @@ def build_injury_impact():
         )
 
     events = pd.read_csv(events_path)
-    player_impacts = load_player_impacts()
-
-    rows = []
-
-    def sum_impact(names_list):
-        total = 0.0
-        for name in names_list:
-            name_norm = name.lower().strip()
-            candidates = player_impacts[
-                player_impacts["PLAYER_NAME_norm"] == name_norm
-            ]
-            if candidates.empty:
-                print(f"Warning: no impact score for {name}")
-                continue
-            impact_val = candidates["impact_score"].max()
-            total += impact_val
-        return total
-
-    for _, ev in events.iterrows():
-        game_id = ev["GAME_ID"]
-        home_out = parse_player_list(ev.get("home_out_players", ""))
-        away_out = parse_player_list(ev.get("away_out_players", ""))
-
-        rows.append(
-            {
-                "GAME_ID": game_id,
-                "home_injury_impact": sum_impact(home_out),
-                "away_injury_impact": sum_impact(away_out),
-            }
-        )
+    # The live feed appends updated rows, so the last row per GAME_ID wins;
+    # write the collapsed file back so it doesn't keep growing
+    deduped = events.drop_duplicates("GAME_ID", keep="last")
+    if len(deduped) < len(events):
+        deduped.to_csv(events_path, index=False)
+    events = deduped
+    out_df = compute_injury_impact(events, load_player_impact_timeline(), load_game_dates())
 
-    out_df = pd.DataFrame(rows)
-    out_path = PROCESSED_DIR / "injury_impact_by_game.csv"
-    out_df.to_csv(out_path, index=False)
-    print(f"Saved injury impact per game → {out_path}")
+    write_injury_impact(out_df)
+    print(f"Saved injury impact per game → {INJURY_IMPACT_PATH}")
 
 
 if __name__ == "__main__":
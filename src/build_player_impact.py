@@ -75,9 +75,7 @@ def fetch_star_logs() -> pd.DataFrame:
     return pd.concat(all_rows, ignore_index=True)
 
 
-def compute_player_impact():
-    df = fetch_star_logs()
-
+def prepare_logs(df):
     # Ensure needed numeric columns exist and are numeric
     numeric_cols = ["PTS", "FGA", "FTA", "TOV", "PLUS_MINUS", "MIN"]
     for col in numeric_cols:
@@ -90,6 +88,72 @@ def compute_player_impact():
 
     # Simple usage proxy: FGA + 0.44*FTA + TOV
     df["usage_possessions"] = df["FGA"] + 0.44 * df["FTA"] + df["TOV"]
+    # PlayerGameLog dates look like "APR 14, 2024"; league logs use ISO dates
+    df["GAME_DATE"] = pd.to_datetime(df["GAME_DATE"], format="mixed")
+    return df
+
+
+def build_impact_timeline(df, window=None, min_games=10):
+    """
+    Point-in-time impact per player per game date.
+
+    Each row holds the player's impact using only games up to and including
+    GAME_DATE, so an as-of join that takes the last row strictly before a game
+    never sees that game or anything after it. `window=None` uses the full
+    expanding history; an int uses the last `window` games instead. Rows
+    before a player's `min_games`-th game are dropped.
+
+    usage_z is scored against the league's expanding per-game usage
+    mean/std (also point-in-time) rather than the full-sample player
+    averages the season table uses.
+    """
+    df = df.sort_values(["PLAYER_ID", "GAME_DATE"], kind="stable").reset_index(drop=True)
+    stat_cols = ["PTS", "PLUS_MINUS", "usage_possessions"]
+
+    g = df.groupby("PLAYER_ID", sort=False)
+    career_games = g.cumcount() + 1
+    if window is None:
+        sums = g[stat_cols].cumsum()
+        games = career_games
+    else:
+        rolled = g[stat_cols].rolling(window, min_periods=1)
+        sums = rolled.sum().reset_index(level=0, drop=True)
+        games = rolled.count()["PTS"].reset_index(level=0, drop=True)
+
+    out = df[["PLAYER_ID", "PLAYER_NAME", "GAME_DATE"]].copy()
+    out["games_played"] = games
+    out["ppg"] = sums["PTS"] / games
+    out["avg_plus_minus"] = sums["PLUS_MINUS"] / games
+    out["usage_per_game"] = sums["usage_possessions"] / games
+
+    # League usage distribution as of each date (all player-games so far)
+    by_date = df.groupby("GAME_DATE")["usage_possessions"].agg(["sum", "count"])
+    by_date["sq"] = (df["usage_possessions"] ** 2).groupby(df["GAME_DATE"]).sum()
+    cum = by_date.cumsum()
+    league_mean = cum["sum"] / cum["count"]
+    league_std = ((cum["sq"] / cum["count"]) - league_mean ** 2).clip(lower=0) ** 0.5
+    league_std = league_std.where(league_std > 0, 1.0)
+    out["usage_z"] = (
+        (out["usage_per_game"] - out["GAME_DATE"].map(league_mean))
+        / out["GAME_DATE"].map(league_std)
+    )
+
+    # Same weights as the season-level impact score
+    out["impact_score"] = (
+        1.0 * out["ppg"]
+        + 0.5 * out["avg_plus_minus"]
+        + 2.0 * out["usage_z"]
+    )
+
+    # Same "enough games to be meaningful" cut as the season table
+    out = out[career_games >= min_games]
+    # One row per player per date (keeps the last if a date repeats)
+    out = out.drop_duplicates(["PLAYER_ID", "GAME_DATE"], keep="last")
+    return out.sort_values("GAME_DATE", kind="stable").reset_index(drop=True)
+
+
+def compute_player_impact():
+    df = prepare_logs(fetch_star_logs())
 
     # NOTE: your Game ID column is named "Game_ID", not "GAME_ID"
     group_cols = ["PLAYER_ID", "PLAYER_NAME", "season_id"]
@@ -130,6 +194,11 @@ def compute_player_impact():
     grp.to_csv(out_path, index=False)
     print(f"Saved player impact scores → {out_path}")
 
+    timeline = build_impact_timeline(df)
+    out_path = PROCESSED_DIR / "player_impact_timeline.csv"
+    timeline.to_csv(out_path, index=False)
+    print(f"Saved point-in-time player impact → {out_path} ({len(timeline)} rows)")
+
 
 if __name__ == "__main__":
     compute_player_impact()
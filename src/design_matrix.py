@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from src.injury_store import attach_injury_impact, INJURY_IMPACT_PATH
+
+DATA_PATH = Path("data/processed/games_with_features.csv")
+CACHE_DIR = Path("data/processed/design_cache")
+
+# Bump when prepare_training_frame changes so old caches aren't reused
+DESIGN_CACHE_VERSION = 1
+
+
+def prepare_training_frame(df, feature_cols):
+    df = attach_injury_impact(df)
+    df = df.sort_values("GAME_DATE").reset_index(drop=True)
+
+    # Only regular season
+    df = df[df["season_type"] == "Regular Season"].copy()
+
+    # drop any rows with NaNs from early games
+    return df.dropna(subset=feature_cols)
+
+
+def source_hash(paths=(DATA_PATH, INJURY_IMPACT_PATH)):
+    h = hashlib.sha1(f"v{DESIGN_CACHE_VERSION}".encode())
+    for path in paths:
+        path = Path(path)
+        h.update(str(path).encode())
+        if not path.exists():
+            continue
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()[:16]
+
+
+def features_hash(feature_cols):
+    return hashlib.sha1(json.dumps(list(feature_cols)).encode()).hexdigest()[:8]
+
+
+def build_design_matrix(feature_cols, out_dir):
+    """Parse the CSV once and write X/y/dates/teams as .npy files in `out_dir`."""
+    df = pd.read_csv(DATA_PATH, parse_dates=["GAME_DATE"])
+    df = prepare_training_frame(df, feature_cols)
+
+    np.save(out_dir / "X.npy", np.ascontiguousarray(df[feature_cols].to_numpy(dtype=np.float32)))
+    np.save(out_dir / "y.npy", df["total_points"].to_numpy(dtype=np.float32))
+    np.save(out_dir / "dates.npy", df["GAME_DATE"].to_numpy(dtype="datetime64[ns]"))
+    np.save(out_dir / "teams.npy", df[["home_team", "away_team"]].to_numpy(dtype=str))
+    with open(out_dir / "meta.json", "w") as f:
+        json.dump({"feature_cols": list(feature_cols), "rows": len(df)}, f)
+
+
+def load_design_matrix(feature_cols, rebuild=False):
+    """
+    Return the training design matrix as memory-mapped, read-only arrays:
+    X (float32, rows x features), y (float32), dates (datetime64) and
+    teams (home, away), sorted by date.
+
+    The arrays live in data/processed/design_cache/<data hash>-<features hash>:
+    the data hash covers the features CSV and the injury sidecar, the other
+    part `feature_cols`, so feature subsets of the same data sit side by side.
+    The first call builds them; later calls (and other processes) map the
+    same files, so workers share the pages instead of each holding a copy.
+    """
+    data_key = source_hash()
+    key = f"{data_key}-{features_hash(feature_cols)}"
+    cache_path = CACHE_DIR / key
+
+    if rebuild and cache_path.exists():
+        shutil.rmtree(cache_path)
+
+    if not cache_path.exists():
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Build in a temp dir and rename so concurrent readers never see a partial cache
+        tmp = Path(tempfile.mkdtemp(dir=CACHE_DIR, prefix=f".{key}-"))
+        try:
+            build_design_matrix(feature_cols, tmp)
+            os.replace(tmp, cache_path)
+            print(f"Built design matrix cache → {cache_path}")
+            # Caches built from older source data can't be hit again; ones
+            # for other feature lists on the same data are kept
+            for stale in CACHE_DIR.iterdir():
+                if (stale.is_dir() and not stale.name.startswith(".")
+                        and not stale.name.startswith(f"{data_key}-")):
+                    shutil.rmtree(stale, ignore_errors=True)
+        except OSError:
+            # another process got there first
+            if not cache_path.exists():
+                raise
+        finally:
+            if tmp.exists():
+                shutil.rmtree(tmp)
+
+    return {
+        name: np.load(cache_path / f"{name}.npy", mmap_mode="r")
+        for name in ["X", "y", "dates", "teams"]
+    }
@@ -0,0 +1,355 @@
+from pathlib import Path
+import argparse
+import asyncio
+import copy
+import io
+import time
+import urllib.error
+import urllib.request
+import pandas as pd
+import joblib
+from src.build_dataset import (
+    advance_team_state,
+    compute_team_features,
+    season_key,
+    season_key_for_date,
+)
+from src.build_injury_impact import (
+    compute_injury_impact,
+    load_game_dates,
+    load_player_impact_timeline,
+    parse_player_list,
+)
+from src.injury_store import attach_injury_impact, upsert_injury_impact, INJURY_COLS
+from src.online_ratings import OnlineRatingEngine
+
+PROCESSED_DIR = Path("data/processed")
+EVENTS_PATH = PROCESSED_DIR / "injury_events.csv"
+LIVE_REPORT_PATH = PROCESSED_DIR / "injury_report_live.csv"
+GAMES_BASIC_PATH = PROCESSED_DIR / "games_basic.csv"
+DATA_PATH = PROCESSED_DIR / "games_with_features.csv"
+MODEL_PATH = Path("models/baseline_total_points_gb.pkl")
+
+# Report change → updated prediction budget, in seconds
+LATENCY_BUDGET = 1.0
+
+# Optional report columns that let us handle games not in games_basic.csv yet
+GAME_INFO_COLS = ["GAME_DATE", "home_team", "away_team"]
+# Optional; without it the season is derived from GAME_DATE
+SEASON_COL = "season_id"
+
+
+class FileInjurySource:
+    """
+    Injury report from a local CSV (GAME_ID, home_out_players, away_out_players,
+    optionally GAME_DATE, home_team, away_team for upcoming games).
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._mtime = None
+
+    async def fetch(self):
+        """
+        Return (report, changed_at) or None if the file hasn't changed since
+        the last fetch. changed_at is the file's mtime (epoch seconds).
+        """
+        if not self.path.exists():
+            return None
+        mtime = self.path.stat().st_mtime_ns
+        if mtime == self._mtime:
+            return None
+        self._mtime = mtime
+        events = await asyncio.to_thread(pd.read_csv, self.path)
+        return events, mtime / 1e9
+
+
+class HttpInjurySource:
+    """
+    Injury report served as CSV over HTTP; uses ETag to skip unchanged reports.
+
+    The server's change time isn't observable precisely (Last-Modified only
+    has 1s resolution), so changed_at is the receive time and detection delay
+    is bounded by the poll interval instead.
+    """
+
+    def __init__(self, url, timeout=5.0):
+        self.url = url
+        self.timeout = timeout
+        self._etag = None
+
+    def _get(self):
+        req = urllib.request.Request(self.url)
+        if self._etag:
+            req.add_header("If-None-Match", self._etag)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                self._etag = resp.headers.get("ETag")
+                body = resp.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return None
+            raise
+        return pd.read_csv(io.BytesIO(body)), time.time()
+
+    async def fetch(self):
+        return await asyncio.to_thread(self._get)
+
+
+def normalize_report(events):
+    """GAME_ID -> (frozenset home_out, frozenset away_out) for diffing."""
+    snapshot = {}
+    for game_id, home, away in zip(
+        events["GAME_ID"],
+        events.get("home_out_players", pd.Series([""] * len(events))),
+        events.get("away_out_players", pd.Series([""] * len(events))),
+    ):
+        snapshot[game_id] = (
+            frozenset(p.lower() for p in parse_player_list(home)),
+            frozenset(p.lower() for p in parse_player_list(away)),
+        )
+    return snapshot
+
+
+def diff_reports(prev, new):
+    """GAME_IDs whose out-lists were added, changed or dropped between snapshots."""
+    changed = [gid for gid, outs in new.items() if prev.get(gid) != outs]
+    removed = [gid for gid in prev if gid not in new]
+    return changed, removed
+
+
+def upsert_injury_events(events, path=EVENTS_PATH):
+    """
+    Append the rows for changed games to injury_events.csv. Earlier rows for
+    the same GAME_ID stay in the file; the last one wins when it's read.
+    """
+    path = Path(path)
+    cols = ["GAME_ID", "home_out_players", "away_out_players"]
+    write_header = not path.exists() or path.stat().st_size == 0
+    if not write_header:
+        # Match the existing header's column order
+        cols = list(pd.read_csv(path, nrows=0).columns)
+    events.reindex(columns=cols).to_csv(path, mode="a", header=write_header, index=False)
+
+
+class PredictionConsumer:
+    """
+    Keeps model predictions for every game in memory and refreshes only the
+    games whose injury impact changed. Games not in games_with_features.csv
+    (i.e. not played yet) get a feature row built from the end-of-history
+    team state, provided the update carries GAME_DATE/home_team/away_team.
+    """
+
+    def __init__(self):
+        df = pd.read_csv(DATA_PATH, parse_dates=["GAME_DATE"])
+        self.games = attach_injury_impact(df).drop_duplicates("GAME_ID").set_index("GAME_ID")
+        self.model = joblib.load(MODEL_PATH)
+        self.feature_cols = list(self.model.feature_names_in_)
+
+        # End-of-history state for building upcoming games' features; loaded
+        # up front so it isn't paid for inside an update
+        basic = pd.read_csv(GAMES_BASIC_PATH, parse_dates=["GAME_DATE"])
+        self.team_state = {}
+        advance_team_state(basic.sort_values("GAME_DATE", kind="stable"), self.team_state)
+        self.engine = OnlineRatingEngine.load()
+
+    def upcoming_features(self, game_id, date, home, away, season=None):
+        """
+        Pre-game feature row for a game that hasn't been played yet. `season`
+        is the season label (as in build_dataset.season_key); it defaults to
+        the one for `date`, so a new season gets the same regression the batch
+        build applies.
+        """
+        if season is None:
+            season = season_key_for_date(date)
+        game = pd.DataFrame([{
+            "GAME_ID": game_id,
+            "GAME_DATE": pd.to_datetime(date),
+            "home_team": home,
+            "away_team": away,
+            "home_points": float("nan"),
+            "away_points": float("nan"),
+        }])
+        # Work on a copy: the loop folds the (unknown) result into the state
+        rec = compute_team_features(game, copy.deepcopy(self.team_state))[0]
+        rec.update(self.engine.pre_game(home, away, season))
+        return pd.Series(rec).drop("GAME_ID")
+
+    def __call__(self, updates):
+        for game_id in updates.index.difference(self.games.index):
+            info = updates.loc[game_id].reindex(GAME_INFO_COLS)
+            if info.isna().any():
+                print(f"Skipping {game_id}: not in {DATA_PATH.name} and report has no "
+                      f"{'/'.join(GAME_INFO_COLS)} for it")
+                continue
+            season_id = updates.loc[game_id].get(SEASON_COL)
+            season = None if pd.isna(season_id) else season_key(int(season_id))
+            self.games.loc[game_id] = self.upcoming_features(game_id, *info, season=season)
+
+        ids = updates.index.intersection(self.games.index)
+        if ids.empty:
+            return None
+        self.games.loc[ids, INJURY_COLS] = updates.loc[ids, INJURY_COLS]
+        preds = self.model.predict(self.games.loc[ids, self.feature_cols])
+        self.games.loc[ids, "pred_total"] = preds
+        for game_id, pred in zip(ids, preds):
+            row = self.games.loc[game_id]
+            print(f"🔄 {row['away_team']} @ {row['home_team']} ({game_id}): pred total {pred:.2f}")
+        return self.games.loc[ids, "pred_total"]
+
+
+class InjuryFeedService:
+    """
+    Polls an injury source, diffs each report against the previous live
+    report and recomputes home/away injury impact for just the affected
+    games. Changed rows are upserted into the injury sidecar and into
+    injury_events.csv, then pushed to every consumer (plain or async
+    callables taking a GAME_ID-indexed frame).
+
+    Only games from the previous live report can be reset: if one drops off
+    and hasn't been played yet, its impact goes back to 0. Games that drop
+    off after being played (the report rolled over to a new day) keep theirs.
+
+    Latency is measured from the source's change time, so it includes the
+    up-to-`interval` detection delay as well as processing. A report that
+    changed before the service started is timed from the start instead.
+    """
+
+    def __init__(self, source, consumers=(), interval=0.5, events_path=EVENTS_PATH,
+                 live_report_path=LIVE_REPORT_PATH):
+        if interval >= LATENCY_BUDGET:
+            raise ValueError(
+                f"interval ({interval}s) must be under the {LATENCY_BUDGET}s latency budget"
+            )
+        self.source = source
+        self.consumers = list(consumers)
+        self.interval = interval
+        self.events_path = events_path
+        self.live_report_path = Path(live_report_path)
+        self.latencies = []
+        self.started_at = time.time()
+        self.pending = None
+
+        # Loaded once; each update only touches the changed games
+        self.timeline = load_player_impact_timeline()
+        self.game_dates = load_game_dates()
+
+        self.report = pd.DataFrame(columns=["GAME_ID"])
+        if self.live_report_path.exists():
+            self.report = pd.read_csv(self.live_report_path)
+        self.snapshot = normalize_report(self.report)
+
+    def report_game_dates(self, events):
+        """games_basic dates plus any GAME_DATE the report carries for new games."""
+        if "GAME_DATE" not in events.columns:
+            return self.game_dates
+        extra = events[["GAME_ID", "GAME_DATE"]].dropna()
+        extra = extra.assign(GAME_DATE=pd.to_datetime(extra["GAME_DATE"]))
+        extra = extra[~extra["GAME_ID"].isin(self.game_dates["GAME_ID"])]
+        return pd.concat([self.game_dates, extra], ignore_index=True)
+
+    def resettable(self, removed, game_dates):
+        """Removed games that are still upcoming (not played before today)."""
+        dates = game_dates.drop_duplicates("GAME_ID").set_index("GAME_ID")["GAME_DATE"]
+        today = pd.Timestamp.today().normalize()
+        return [gid for gid in removed if not (dates.get(gid, today) < today)]
+
+    async def apply_report(self, events, changed_at):
+        new_snapshot = normalize_report(events)
+        changed, removed = diff_reports(self.snapshot, new_snapshot)
+        game_dates = self.report_game_dates(pd.concat([events, self.report], ignore_index=True))
+        reset = self.resettable(removed, game_dates)
+
+        if not changed and not reset:
+            # Nothing to recompute (at most played games rolled off); no writes
+            self.snapshot = new_snapshot
+            self.report = events
+            return None
+
+        changed_events = events[events["GAME_ID"].isin(changed)]
+        updates = compute_injury_impact(changed_events, self.timeline, game_dates).set_index("GAME_ID")
+        if reset:
+            # Dropped off the report before tip-off: back to no injury impact
+            cleared = pd.DataFrame(0.0, index=pd.Index(reset, name="GAME_ID"), columns=INJURY_COLS)
+            updates = pd.concat([updates, cleared])
+
+        upsert_injury_impact(updates)
+
+        # Pass game info through so consumers can handle games not played yet
+        info_cols = [c for c in GAME_INFO_COLS + [SEASON_COL] if c in events.columns]
+        if info_cols:
+            info = events.drop_duplicates("GAME_ID").set_index("GAME_ID")[info_cols]
+            updates = updates.join(info)
+
+        for consumer in self.consumers:
+            result = consumer(updates)
+            if asyncio.iscoroutine(result):
+                await result
+
+        latency = time.time() - max(changed_at, self.started_at)
+        self.latencies.append(latency)
+        flag = "" if latency <= LATENCY_BUDGET else f" (over {LATENCY_BUDGET:.1f}s budget)"
+        print(f"Applied injury update for {len(updates)} games "
+              f"{latency * 1000:.0f} ms after the report changed{flag}")
+
+        # Keep the batch pipeline's input in sync by appending just these games
+        # (reset games get an empty out-list row)
+        new_events = changed_events
+        if reset:
+            cleared_events = pd.DataFrame({"GAME_ID": reset, "home_out_players": "", "away_out_players": ""})
+            new_events = pd.concat([changed_events, cleared_events], ignore_index=True)
+        await asyncio.to_thread(upsert_injury_events, new_events, self.events_path)
+
+        # Only now that everything above succeeded does this report become
+        # the baseline; if anything raised, the next poll retries it
+        self.snapshot = new_snapshot
+        self.report = events
+        await asyncio.to_thread(events.to_csv, self.live_report_path, index=False)
+        return updates
+
+    async def poll_once(self):
+        fetched = await self.source.fetch()
+        if fetched is None:
+            # Retry a report whose update failed last time (a newer one replaces it)
+            fetched = self.pending
+        self.pending = None
+        if fetched is None:
+            return None
+        try:
+            return await self.apply_report(*fetched)
+        except Exception:
+            self.pending = fetched
+            raise
+
+    async def run(self, max_polls=None):
+        polls = 0
+        while max_polls is None or polls < max_polls:
+            try:
+                await self.poll_once()
+            except Exception as e:
+                print(f"Error polling injury source: {e}")
+            polls += 1
+            await asyncio.sleep(self.interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Poll an injury report and refresh injury impact + predictions for changed games."
+    )
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--file", help="Local CSV injury report to watch")
+    src.add_argument("--url", help="HTTP URL serving the injury report as CSV")
+    parser.add_argument("--interval", type=float, default=0.5,
+                        help=f"Seconds between polls (must be under {LATENCY_BUDGET}s)")
+    args = parser.parse_args()
+
+    source = FileInjurySource(args.file) if args.file else HttpInjurySource(args.url)
+    service = InjuryFeedService(source, consumers=[PredictionConsumer()], interval=args.interval)
+    try:
+        asyncio.run(service.run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+from pathlib import Path
+import pandas as pd
+
+PROCESSED_DIR = Path("data/processed")
+INJURY_IMPACT_PATH = PROCESSED_DIR / "injury_impact_by_game.csv"
+
+INJURY_COLS = ["home_injury_impact", "away_injury_impact"]
+
+# Compact once appends have doubled the file since the last full write
+# (and it's past this floor), so growth is bounded at ~2x the live rows.
+COMPACT_MIN_BYTES = 1 << 20
+
+
+def compacted_size_path(path):
+    path = Path(path)
+    return path.with_name(f".{path.name}.compacted")
+
+
+def load_injury_impact(path=INJURY_IMPACT_PATH):
+    """
+    Read the GAME_ID-keyed injury sidecar as a frame indexed by GAME_ID.
+
+    Upserts are appended to the file, so later rows for a GAME_ID win.
+    Returns an empty frame if the sidecar is missing or empty.
+    """
+    empty = pd.DataFrame(columns=INJURY_COLS, index=pd.Index([], name="GAME_ID"))
+    path = Path(path)
+    if not path.exists():
+        return empty
+
+    try:
+        inj = pd.read_csv(path)
+    except pd.errors.EmptyDataError:
+        return empty
+
+    if inj.empty or "GAME_ID" not in inj.columns:
+        return empty
+
+    for col in INJURY_COLS:
+        if col not in inj.columns:
+            inj[col] = 0.0
+
+    inj = inj.drop_duplicates("GAME_ID", keep="last")
+    return inj.set_index("GAME_ID")[INJURY_COLS]
+
+
+def write_injury_impact(inj, path=INJURY_IMPACT_PATH):
+    """Replace the whole sidecar (used by the full rebuild and by compaction)."""
+    inj = inj.reset_index() if inj.index.name == "GAME_ID" else inj
+    inj[["GAME_ID"] + INJURY_COLS].to_csv(path, index=False)
+    compacted_size_path(path).write_text(str(Path(path).stat().st_size))
+
+
+def upsert_injury_impact(rows, path=INJURY_IMPACT_PATH):
+    """
+    Insert or update injury impact for just the games in `rows`
+    (GAME_ID, home_injury_impact, away_injury_impact). Rows are appended,
+    so the cost is proportional to the number of changed games; the file
+    is compacted once appends have doubled its size.
+    """
+    rows = rows.reset_index() if rows.index.name == "GAME_ID" else rows
+    if rows.empty:
+        return
+    path = Path(path)
+    write_header = not path.exists() or path.stat().st_size == 0
+    rows[["GAME_ID"] + INJURY_COLS].to_csv(path, mode="a", header=write_header, index=False)
+
+    marker = compacted_size_path(path)
+    base = int(marker.read_text()) if marker.exists() else 0
+    if path.stat().st_size > max(COMPACT_MIN_BYTES, 2 * base):
+        compact_injury_impact(path)
+
+
+def compact_injury_impact(path=INJURY_IMPACT_PATH):
+    """Rewrite the sidecar with one row per GAME_ID."""
+    write_injury_impact(load_injury_impact(path), path)
+
+
+def attach_injury_impact(df, path=INJURY_IMPACT_PATH):
+    """
+    Join the injury sidecar onto a games frame by GAME_ID at read time.
+    Games with no injury entry keep their existing value (or 0).
+    """
+    inj = load_injury_impact(path)
+    df = df.copy()
+    for col in INJURY_COLS:
+        base = df[col] if col in df.columns else 0.0
+        df[col] = df["GAME_ID"].map(inj[col]).fillna(base).fillna(0.0).astype(float)
+    return df
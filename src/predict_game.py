@@ -2,6 +2,7 @@ from pathlib import Path
 import argparse
 import pandas as pd
 import joblib
+from src.injury_store import attach_injury_impact
 
 
 DATA_PATH = Path("data/processed/games_with_features.csv")
@@ -10,6 +11,7 @@ MODEL_PATH = Path("models/baseline_total_points_gb.pkl")
 
 def load_data_and_model():
     df = pd.read_csv(DATA_PATH, parse_dates=["GAME_DATE"])
+    df = attach_injury_impact(df)
     model = joblib.load(MODEL_PATH)
     return df, model
 
@@ -83,6 +85,11 @@ def main():
             "away_env_last5",
             "home_injury_impact",
             "away_injury_impact",
+            "home_off_elo",
+            "home_def_elo",
+            "away_off_elo",
+            "away_def_elo",
+            "elo_expected_total",
         ]
 
     # Make sure all needed columns exist for this row
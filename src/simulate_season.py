@@ -0,0 +1,222 @@
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import time
+import numpy as np
+import pandas as pd
+import joblib
+from src.injury_store import attach_injury_impact
+
+DATA_PATH = Path("data/processed/games_with_features.csv")
+MODEL_PATH = Path("models/baseline_total_points_gb.pkl")
+RESIDUALS_PATH = Path("models/test_residuals.npy")
+SPLIT_PATH = Path("models/train_split.json")
+
+# Standard -110 juice: risk 1 unit to win 100/110
+WIN_PAYOUT = 100 / 110
+
+
+def load_residuals():
+    if not RESIDUALS_PATH.exists():
+        raise FileNotFoundError(
+            "test_residuals.npy not found. "
+            "Run `py -m src.train_model` first."
+        )
+    return np.load(RESIDUALS_PATH)
+
+
+def load_train_end():
+    if not SPLIT_PATH.exists():
+        raise FileNotFoundError(
+            "train_split.json not found. "
+            "Run `py -m src.train_model` first."
+        )
+    with open(SPLIT_PATH) as f:
+        return pd.Timestamp(json.load(f)["train_end"])
+
+
+def predict_for_lines(lines, include_in_sample=False):
+    """
+    Batch model predictions for every GAME_ID in `lines` (GAME_ID, line).
+
+    Games on or before the last training date are dropped: the model has
+    already seen their totals, so test-split residuals would understate how
+    wrong it is on them. `include_in_sample=True` keeps them with a warning.
+    """
+    df = pd.read_csv(DATA_PATH, parse_dates=["GAME_DATE"])
+    df = attach_injury_impact(df)
+    model = joblib.load(MODEL_PATH)
+
+    games = lines.merge(df, on="GAME_ID", how="inner")
+    missing = len(lines) - len(games)
+    if missing:
+        print(f"Warning: {missing} GAME_IDs in lines file not found in features")
+
+    train_end = load_train_end()
+    in_sample = games["GAME_DATE"] <= train_end
+    if in_sample.any():
+        if include_in_sample:
+            print(f"Warning: {in_sample.sum()} games are from the training data "
+                  f"(on or before {train_end.date()}); results will be optimistic")
+        else:
+            print(f"Dropping {in_sample.sum()} games on or before {train_end.date()} "
+                  "(training data); pass --include-in-sample to keep them")
+            games = games[~in_sample]
+
+    games = games.sort_values("GAME_DATE", kind="stable").reset_index(drop=True)
+    games["pred_total"] = model.predict(games[list(model.feature_names_in_)])
+    return games
+
+
+def bet_sides(preds, lines, edge=3.0):
+    """+1 = Over, -1 = Under, 0 = No Bet, from the model's edge over the line."""
+    diff = np.asarray(preds, dtype=float) - np.asarray(lines, dtype=float)
+    return np.where(diff >= edge, 1, np.where(diff <= -edge, -1, 0)).astype(np.int8)
+
+
+def simulate_chunk(preds, lines, sides, residuals, n_sims, seed, stake=1.0):
+    """
+    Simulate `n_sims` seasons at once: every game's total is its prediction
+    plus a residual drawn from the empirical test residuals. Returns the
+    season P&L, the max drawdown and the lowest running P&L of each
+    simulated season.
+    """
+    rng = np.random.default_rng(seed)
+    draws = rng.integers(0, len(residuals), size=(n_sims, len(preds)))
+    totals = preds + residuals[draws]
+
+    # +1 Over hit / -1 Under hit / 0 push, then signed by the side we bet
+    result = np.sign(totals - lines) * sides
+    pnl = np.where(result > 0, stake * WIN_PAYOUT, np.where(result < 0, -stake, 0.0))
+
+    path = np.cumsum(pnl, axis=1)
+    peak = np.maximum.accumulate(np.maximum(path, 0.0), axis=1)
+    drawdown = (peak - path).max(axis=1)
+    return path[:, -1], drawdown, path.min(axis=1)
+
+
+def simulate_season(preds, lines, residuals, n_sims=100_000, edge=3.0, stake=1.0,
+                    chunk_size=10_000, seed=42, workers=1):
+    """
+    Monte Carlo distribution of season P&L for betting `preds` against `lines`.
+
+    Simulated totals are centred on the model's own prediction, so every bet
+    that clears `edge` is +EV by construction. The output is the spread of
+    outcomes *if the model is right on average*, not evidence that it is;
+    check that against a backtest on real closing lines.
+
+    Seasons are generated `chunk_size` at a time so memory stays at roughly
+    chunk_size x n_games draws regardless of `n_sims`. Each chunk gets its
+    own child seed from `seed`, so results are the same for any `workers`
+    count; `workers > 1` shards chunks across processes.
+    """
+    preds = np.asarray(preds, dtype=np.float64)
+    lines = np.asarray(lines, dtype=np.float64)
+    residuals = np.asarray(residuals, dtype=np.float64)
+    sides = bet_sides(preds, lines, edge)
+
+    # No-bet games can't move P&L, so only simulate the games we bet
+    bet = sides != 0
+    preds, lines, sides = preds[bet], lines[bet], sides[bet]
+
+    if not bet.any():
+        # Nothing clears the edge: every season is flat
+        zeros = np.zeros(n_sims)
+        return {"pnl": zeros, "max_drawdown": zeros.copy(), "low": zeros.copy(), "n_bets": 0}
+
+    sizes = [min(chunk_size, n_sims - start) for start in range(0, n_sims, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(preds, lines, sides, residuals, size, s, stake) for size, s in zip(sizes, seeds)]
+
+    if workers == 1:
+        parts = [simulate_chunk(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(simulate_chunk, *zip(*args)))
+
+    return {
+        "pnl": np.concatenate([p[0] for p in parts]),
+        "max_drawdown": np.concatenate([p[1] for p in parts]),
+        "low": np.concatenate([p[2] for p in parts]),
+        "n_bets": int(bet.sum()),
+    }
+
+
+def summarize(sim, bankroll=100.0):
+    pnl = sim["pnl"]
+    final = bankroll + pnl
+    q = np.percentile(final, [5, 25, 50, 75, 95])
+    print(f"Bets per season : {sim['n_bets']}")
+    print(f"Mean P&L        : {pnl.mean():+.2f} units")
+    print(f"P(profit)       : {(pnl > 0).mean():.1%}")
+    print(f"Median max DD   : {np.median(sim['max_drawdown']):.1f} units")
+    print(f"P(ruin)         : {(sim['low'] <= -bankroll).mean():.1%}")
+    print("Final bankroll  : " + "  ".join(
+        f"p{p}={v:.1f}" for p, v in zip([5, 25, 50, 75, 95], q)
+    ))
+
+
+def benchmark_throughput(n_games=1230, n_sims=200_000, workers=1, chunk_size=10_000):
+    """Time `simulate_season` on synthetic games and report simulated games/sec.
+    Every game is bet (edge=0) so no games are skipped."""
+    rng = np.random.default_rng(0)
+    lines = rng.normal(228, 8, n_games).round() + 0.5
+    preds = lines + rng.normal(0, 4, n_games)
+    residuals = rng.normal(0, 17, 5000)
+
+    start = time.perf_counter()
+    simulate_season(preds, lines, residuals, n_sims=n_sims, edge=0.0,
+                    chunk_size=chunk_size, workers=workers)
+    elapsed = time.perf_counter() - start
+
+    rate = n_games * n_sims / elapsed
+    print(f"Simulated {n_games * n_sims:,} games in {elapsed:.2f}s → {rate:,.0f} games/sec "
+          f"({workers} worker{'s' if workers != 1 else ''})")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Monte Carlo season simulation of Over/Under betting P&L."
+    )
+    parser.add_argument("lines", nargs="?", help="CSV with GAME_ID and line columns")
+    parser.add_argument("--sims", type=int, default=100_000, help="Seasons to simulate")
+    parser.add_argument("--edge", type=float, default=3.0, help="Min |pred - line| to bet")
+    parser.add_argument("--bankroll", type=float, default=100.0, help="Starting bankroll in units")
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--include-in-sample", action="store_true",
+                        help="Keep games the model was trained on (optimistic)")
+    parser.add_argument("--benchmark", action="store_true", help="Run the throughput benchmark")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_throughput(n_sims=args.sims, workers=args.workers, chunk_size=args.chunk_size)
+        return
+
+    if args.lines is None:
+        parser.error("lines CSV is required unless --benchmark is given")
+
+    games = predict_for_lines(pd.read_csv(args.lines), include_in_sample=args.include_in_sample)
+    if games.empty:
+        print("No out-of-sample games to simulate.")
+        return
+    sim = simulate_season(
+        games["pred_total"],
+        games["line"],
+        load_residuals(),
+        n_sims=args.sims,
+        edge=args.edge,
+        chunk_size=args.chunk_size,
+        seed=args.seed,
+        workers=args.workers,
+    )
+    summarize(sim, bankroll=args.bankroll)
+    print("(Totals are centred on the model's predictions, so every bet counts as +EV; "
+          "treat this as variance, not proof of edge.)")
+
+
+if __name__ == "__main__":
+    main()
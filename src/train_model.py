@@ -3,45 +3,13 @@ import pandas as pd
 from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error
 import joblib
+import json
+import numpy as np
+from src.design_matrix import load_design_matrix
 
-DATA_PATH = Path("data/processed/games_with_features.csv")
 MODELS_DIR = Path("models")
 
-
-def train_model():
-    MODELS_DIR.mkdir(exist_ok=True)
-
-    df = pd.read_csv(DATA_PATH, parse_dates=["GAME_DATE"])
-    df = df.sort_values("GAME_DATE").reset_index(drop=True)
-
-    # Only regular season
-    df = df[df["season_type"] == "Regular Season"].copy()
-
-
-
-    # drop any rows with NaNs from early games
-    df = df.dropna(subset=[
-    "home_off_rating_simple",
-    "away_off_rating_simple",
-    "home_home_off_rating",
-    "away_away_off_rating",
-    "home_rest_days",
-    "away_rest_days",
-    "home_is_b2b",
-    "away_is_b2b",
-    "home_env_last5",
-    "away_env_last5",
-    "home_injury_impact",
-    "away_injury_impact",
-])
-
-
-
-    split_idx = int(0.8 * len(df))
-    train = df.iloc[:split_idx]
-    test = df.iloc[split_idx:]
-
-    feature_cols = [
+FEATURE_COLS = [
     "home_off_rating_simple",
     "away_off_rating_simple",
     "home_home_off_rating",
@@ -54,16 +22,28 @@ def train_model():
     "away_env_last5",
     "home_injury_impact",
     "away_injury_impact",
+    "home_off_elo",
+    "home_def_elo",
+    "away_off_elo",
+    "away_def_elo",
+    "elo_expected_total",
 ]
 
 
+def train_model():
+    MODELS_DIR.mkdir(exist_ok=True)
+
+    # Regular season, sorted by date, NaN rows dropped; memory-mapped from the cache
+    dm = load_design_matrix(FEATURE_COLS)
 
+    split_idx = int(0.8 * len(dm["y"]))
 
-    X_train = train[feature_cols]
-    y_train = train["total_points"]
+    # DataFrames over the mapped arrays (no copy) so the model keeps feature names
+    X_train = pd.DataFrame(dm["X"][:split_idx], columns=FEATURE_COLS, copy=False)
+    y_train = dm["y"][:split_idx]
 
-    X_test = test[feature_cols]
-    y_test = test["total_points"]
+    X_test = pd.DataFrame(dm["X"][split_idx:], columns=FEATURE_COLS, copy=False)
+    y_test = dm["y"][split_idx:]
 
     model = GradientBoostingRegressor(
         n_estimators=400,
@@ -84,8 +64,13 @@ def train_model():
     print(f"Train MAE: {mae_train:.2f} points")
     print(f"Test  MAE: {mae_test:.2f} points")
 
-    test = test.copy()
-    test["pred_total"] = y_test_pred
+    test = pd.DataFrame({
+        "GAME_DATE": dm["dates"][split_idx:],
+        "home_team": dm["teams"][split_idx:, 0],
+        "away_team": dm["teams"][split_idx:, 1],
+        "total_points": y_test,
+        "pred_total": y_test_pred,
+    })
 
     print("\nSample test games (actual vs predicted totals):")
     print(
@@ -98,6 +83,18 @@ def train_model():
     joblib.dump(model, model_path)
     print(f"\nSaved model to {model_path}")
 
+    # Out-of-sample residuals from the chronological test split (used by simulate_season)
+    residuals_path = MODELS_DIR / "test_residuals.npy"
+    np.save(residuals_path, (y_test - y_test_pred).astype(np.float64))
+    print(f"Saved test residuals to {residuals_path}")
+
+    # Last date the model trained on, so the simulator can stay out of sample
+    split_path = MODELS_DIR / "train_split.json"
+    train_end = pd.Timestamp(dm["dates"][split_idx - 1]).date().isoformat()
+    with open(split_path, "w") as f:
+        json.dump({"train_end": train_end}, f)
+    print(f"Saved train/test split date to {split_path}")
+
 
 if __name__ == "__main__":
     train_model()